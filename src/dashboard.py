@@ -70,12 +70,17 @@ st.markdown("""
 """, unsafe_allow_html=True)
 
 # ── Session state ─────────────────────────────────────────────
+DEPTH_LEVELS = 20
+
 if "sim" not in st.session_state:
     st.session_state.sim = None
 if "initialized" not in st.session_state:
     st.session_state.initialized = False
 if "trade_log" not in st.session_state:
     st.session_state.trade_log = []
+if "depth_cum_bufs" not in st.session_state:
+    # scratch buffers for cumulative depth, reused across reruns
+    st.session_state.depth_cum_bufs = (np.empty(DEPTH_LEVELS), np.empty(DEPTH_LEVELS))
 
 # ── Sidebar ───────────────────────────────────────────────────
 st.sidebar.title("📈 LOB Simulator")
@@ -92,17 +97,24 @@ st.sidebar.markdown("---")
 st.sidebar.subheader("Market")
 symbol = st.sidebar.selectbox("Symbol", ["XBTUSD", "ETHUSD", "SOLUSD"])
 
+@st.cache_data(ttl=5, show_spinner=False)
+def cached_snapshot(symbol):
+    # repeated clicks within the TTL reuse the snapshot already on disk
+    from fetch import save_snapshot
+    save_snapshot(symbol)
+    return symbol
+
 if st.sidebar.button("🔄 Load Real Market Data"):
     with st.spinner("Fetching live data from Kraken..."):
         try:
-            sys.path.insert(0, os.path.dirname(__file__))
-            from fetch import save_snapshot
-            save_snapshot(symbol)
+            cached_snapshot(symbol)
             sim = MarketSimulator(symbol)
             sim.seed_from_snapshot()
             st.session_state.sim = sim
             st.session_state.initialized = True
             st.session_state.trade_log = []
+            st.session_state.book_snapshot = None
+            st.session_state.lttb_keep = {}
             st.sidebar.success(f"Loaded {symbol} data!")
         except Exception as e:
             st.sidebar.error(f"Error: {e}")
@@ -114,28 +126,52 @@ def get_sim():
         st.stop()
     return st.session_state.sim
 
+def book_snapshot(sim):
+    """
+    Return (bid, ask, spread, mid, depth, recent_trades) for the current
+    book, recomputed only when the book's version has moved.
+    """
+    book = sim.book
+    key = (id(book), book.version)
+    cached = st.session_state.get("book_snapshot")
+    if cached is not None and cached[0] == key:
+        return cached[1]
+
+    bid, ask, mid, spread = book.top_of_book()
+    snap = (
+        bid,
+        ask,
+        spread,
+        mid,
+        book.get_depth_arrays(levels=DEPTH_LEVELS),
+        book.get_recent_trades_arrays(20),
+    )
+    st.session_state.book_snapshot = (key, snap)
+    return snap
+
 def depth_chart(sim):
-    bids, asks = sim.book.get_depth(levels=20)
-    if not bids or not asks:
+    bid_prices, bid_qtys, ask_prices, ask_qtys = book_snapshot(sim)[4]
+    if not len(bid_prices) or not len(ask_prices):
         return None
 
-    bid_prices = [b[0] for b in bids]
-    bid_qtys = [b[1] for b in bids]
-    ask_prices = [a[0] for a in asks]
-    ask_qtys = [a[1] for a in asks]
-
     # cumulative depth
-    bid_cum = np.cumsum(bid_qtys)
-    ask_cum = np.cumsum(ask_qtys)
+    bid_buf, ask_buf = st.session_state.depth_cum_bufs
+    bid_cum = np.cumsum(bid_qtys, out=bid_buf[:len(bid_qtys)])
+    ask_cum = np.cumsum(ask_qtys, out=ask_buf[:len(ask_qtys)])
+
+    return _depth_chart_cached(bid_prices, bid_cum, ask_prices, ask_cum)
+
+@st.cache_data(max_entries=8, show_spinner=False)
+def _depth_chart_cached(bid_prices, bid_cum, ask_prices, ask_cum):
 
     fig = go.Figure()
-    fig.add_trace(go.Scatter(
+    fig.add_trace(go.Scattergl(
         x=bid_prices, y=bid_cum,
         fill="tozeroy", name="Bids",
         line=dict(color="#00cc88", width=2),
         fillcolor="rgba(0,204,136,0.15)"
     ))
-    fig.add_trace(go.Scatter(
+    fig.add_trace(go.Scattergl(
         x=ask_prices, y=ask_cum,
         fill="tozeroy", name="Asks",
         line=dict(color="#ff4466", width=2),
@@ -153,16 +189,92 @@ def depth_chart(sim):
     )
     return fig
 
-def order_book_table(sim):
-    bids, asks = sim.book.get_depth(levels=15)
-    bid_df = pd.DataFrame(bids, columns=["Price", "Quantity"])
-    ask_df = pd.DataFrame(asks, columns=["Price", "Quantity"])
-    bid_df["Price"] = bid_df["Price"].apply(lambda x: f"${x:,.2f}")
-    ask_df["Price"] = ask_df["Price"].apply(lambda x: f"${x:,.2f}")
-    bid_df["Quantity"] = bid_df["Quantity"].apply(lambda x: f"{x:.4f}")
-    ask_df["Quantity"] = ask_df["Quantity"].apply(lambda x: f"{x:.4f}")
+def order_book_table(sim, levels=15):
+    bid_prices, bid_qtys, ask_prices, ask_qtys = book_snapshot(sim)[4]
+    return _order_book_table_cached(bid_prices[:levels], bid_qtys[:levels],
+                                    ask_prices[:levels], ask_qtys[:levels])
+
+@st.cache_data(max_entries=8, show_spinner=False)
+def _order_book_table_cached(bid_prices, bid_qtys, ask_prices, ask_qtys):
+    bid_df = pd.DataFrame({"Price": bid_prices, "Quantity": bid_qtys})
+    ask_df = pd.DataFrame({"Price": ask_prices, "Quantity": ask_qtys})
+    bid_df["Price"] = "$" + bid_df["Price"].map("{:,.2f}".format)
+    ask_df["Price"] = "$" + ask_df["Price"].map("{:,.2f}".format)
+    bid_df["Quantity"] = bid_df["Quantity"].map("{:.4f}".format)
+    ask_df["Quantity"] = ask_df["Quantity"].map("{:.4f}".format)
     return bid_df, ask_df
 
+def lttb_indices(y, n_out=2000):
+    """
+    Largest-Triangle-Three-Buckets downsampling of a series plotted
+    against its row index. Returns the row positions to keep.
+    """
+    n = len(y)
+    if n <= n_out or n_out < 3:
+        return np.arange(n)
+
+    y = np.asarray(y, dtype=float)
+    x = np.arange(n, dtype=float)
+    edges = np.linspace(1, n - 1, n_out - 1).astype(int)
+
+    keep = np.empty(n_out, dtype=int)
+    keep[0] = 0
+    keep[-1] = n - 1
+    a = 0
+    for i in range(n_out - 2):
+        start, end = edges[i], edges[i + 1]
+        # average of the next bucket is the third triangle vertex
+        nxt_start = end
+        nxt_end = edges[i + 2] if i + 2 < len(edges) else n
+        avg_x = x[nxt_start:nxt_end].mean()
+        avg_y = y[nxt_start:nxt_end].mean()
+
+        area = np.abs((x[a] - avg_x) * (y[start:end] - y[a]) -
+                      (x[a] - x[start:end]) * (avg_y - y[a]))
+        a = start + int(np.argmax(area))
+        keep[i + 1] = a
+    return keep
+
+def downsample(df, column, n_out=2000):
+    """
+    Return the rows of df that LTTB keeps for plotting column. Small frames
+    are plotted as-is; kept positions are cached per column and row count,
+    since metrics only ever grow.
+    """
+    n = len(df)
+    if n <= 2 * n_out:
+        return df
+    cache = st.session_state.setdefault("lttb_keep", {})
+    key = (column, n, n_out)
+    keep = cache.get(column)
+    if keep is None or keep[0] != key:
+        keep = (key, lttb_indices(df[column].to_numpy(), n_out))
+        cache[column] = keep
+    return df.iloc[keep[1]]
+
+def metric_chart(metrics_df, column, title, color, zero_line=False):
+    """
+    Line chart of one metrics column. The figure is built once per session
+    and reused on later reruns with only its trace data swapped in.
+    """
+    plot_df = downsample(metrics_df, column)
+    figs = st.session_state.setdefault("metric_figs", {})
+    fig = figs.get(column)
+    if fig is None:
+        fig = px.line(plot_df, x=plot_df.index, y=column,
+                      title=title,
+                      color_discrete_sequence=[color],
+                      render_mode="webgl")
+        if zero_line:
+            fig.add_hline(y=0, line_dash="dash", line_color="white", opacity=0.3)
+        fig.update_layout(plot_bgcolor="#0f1117", paper_bgcolor="#0f1117",
+                          font=dict(color="#e2e8f0"), height=300)
+        figs[column] = fig
+    else:
+        fig.data[0].x = plot_df.index
+        fig.data[0].y = plot_df[column]
+    return fig
+
 # ── Pages ─────────────────────────────────────────────────────
 
 # OVERVIEW
@@ -183,10 +295,7 @@ if page == "Overview":
         """)
     else:
         sim = get_sim()
-        bid = sim.book.best_bid()
-        ask = sim.book.best_ask()
-        spread = sim.book.spread()
-        mid = sim.book.mid_price()
+        bid, ask, spread, mid, _, recent_trades = book_snapshot(sim)
 
         col1, col2, col3, col4, col5 = st.columns(5)
         col1.metric("Best Bid", f"${bid:,.2f}" if bid else "N/A")
@@ -202,16 +311,18 @@ if page == "Overview":
             if fig:
                 st.plotly_chart(fig, use_container_width=True)
         with col2:
-            trades = sim.book.get_trade_history(20)
-            if trades:
-                trade_data = [{
-                    "Price": f"${t.price:,.2f}",
-                    "Quantity": f"{t.quantity:.4f}",
-                    "Buy ID": t.buy_order_id,
-                    "Sell ID": t.sell_order_id,
-                } for t in reversed(trades)]
+            prices, qtys, buy_ids, sell_ids = recent_trades
+            if len(prices):
+                trade_data = pd.DataFrame({
+                    "Price": prices[::-1],
+                    "Quantity": qtys[::-1],
+                    "Buy ID": buy_ids[::-1],
+                    "Sell ID": sell_ids[::-1],
+                })
+                trade_data["Price"] = "$" + trade_data["Price"].map("{:,.2f}".format)
+                trade_data["Quantity"] = trade_data["Quantity"].map("{:.4f}".format)
                 st.subheader("Recent Trades")
-                st.dataframe(pd.DataFrame(trade_data), use_container_width=True)
+                st.dataframe(trade_data, use_container_width=True)
             else:
                 st.info("No trades yet.")
 
@@ -220,9 +331,7 @@ elif page == "Order Book":
     st.title("Live Order Book")
     sim = get_sim()
 
-    bid = sim.book.best_bid()
-    ask = sim.book.best_ask()
-    spread = sim.book.spread()
+    bid, ask, spread, _, _, _ = book_snapshot(sim)
 
     col1, col2, col3 = st.columns(3)
     col1.metric("Best Bid", f"${bid:,.2f}" if bid else "N/A")
@@ -251,7 +360,8 @@ elif page == "Place Order":
     st.title("Place Order")
     sim = get_sim()
 
-    st.markdown(f"**Current mid price: ${sim.book.mid_price():,.2f}**")
+    bid, ask, _, mid, _, _ = book_snapshot(sim)
+    st.markdown(f"**Current mid price: ${mid:,.2f}**")
     st.markdown("---")
 
     col1, col2 = st.columns(2)
@@ -262,7 +372,7 @@ elif page == "Place Order":
 
     with col2:
         if order_type == "Limit":
-            default_price = sim.book.best_bid() if side == "Buy" else sim.book.best_ask()
+            default_price = bid if side == "Buy" else ask
             price = st.number_input("Price (USD)", min_value=1.0,
                                      value=float(default_price) if default_price else 68000.0,
                                      step=0.1, format="%.2f")
@@ -295,8 +405,8 @@ elif page == "Place Order":
     if st.session_state.trade_log:
         st.subheader("Your Trade History")
         df = pd.DataFrame(st.session_state.trade_log)
-        df["Price"] = df["Price"].apply(lambda x: f"${x:,.2f}")
-        df["Qty"] = df["Qty"].apply(lambda x: f"{x:.4f}")
+        df["Price"] = "$" + df["Price"].map("{:,.2f}".format)
+        df["Qty"] = df["Qty"].map("{:.4f}".format)
         st.dataframe(df, use_container_width=True, hide_index=True)
 
 # SIMULATION
@@ -313,7 +423,7 @@ elif page == "Simulation":
     with col1:
         n_events = st.slider("Number of orders", 100, 2000, 500, step=100)
     with col2:
-        mid_price = sim.book.mid_price() or 68000.0
+        mid_price = book_snapshot(sim)[3] or 68000.0
         st.metric("Current mid price", f"${mid_price:,.2f}")
 
     if st.button("▶ Run Simulation", type="primary"):
@@ -328,27 +438,16 @@ elif page == "Simulation":
         col1, col2 = st.columns(2)
 
         with col1:
-            fig = px.line(metrics_df, x=metrics_df.index, y="mid_price",
-                         title="Mid Price Over Time",
-                         color_discrete_sequence=["#7c9ef5"])
-            fig.update_layout(plot_bgcolor="#0f1117", paper_bgcolor="#0f1117",
-                             font=dict(color="#e2e8f0"), height=300)
+            fig = metric_chart(metrics_df, "mid_price", "Mid Price Over Time", "#7c9ef5")
             st.plotly_chart(fig, use_container_width=True)
 
         with col2:
-            fig = px.line(metrics_df, x=metrics_df.index, y="spread",
-                         title="Spread Over Time",
-                         color_discrete_sequence=["#ff9944"])
-            fig.update_layout(plot_bgcolor="#0f1117", paper_bgcolor="#0f1117",
-                             font=dict(color="#e2e8f0"), height=300)
+            fig = metric_chart(metrics_df, "spread", "Spread Over Time", "#ff9944")
             st.plotly_chart(fig, use_container_width=True)
 
-        fig = px.line(metrics_df, x=metrics_df.index, y="order_flow_imbalance",
-                     title="Order Flow Imbalance (Buy Volume - Sell Volume)",
-                     color_discrete_sequence=["#00cc88"])
-        fig.add_hline(y=0, line_dash="dash", line_color="white", opacity=0.3)
-        fig.update_layout(plot_bgcolor="#0f1117", paper_bgcolor="#0f1117",
-                         font=dict(color="#e2e8f0"), height=300)
+        fig = metric_chart(metrics_df, "order_flow_imbalance",
+                           "Order Flow Imbalance (Buy Volume - Sell Volume)", "#00cc88",
+                           zero_line=True)
         st.plotly_chart(fig, use_container_width=True)
 
 # ANALYTICS
@@ -357,7 +456,7 @@ elif page == "Analytics":
     sim = get_sim()
 
     metrics_df = sim.get_metrics_df()
-    trades = sim.book.get_trade_history(1000)
+    trade_prices = sim.book.get_trade_prices_array(1000)
 
     col1, col2, col3, col4 = st.columns(4)
     col1.metric("Total Trades", sim.book.total_trades)
@@ -380,8 +479,7 @@ elif page == "Analytics":
         st.markdown("---")
 
         # price distribution
-        if trades:
-            trade_prices = [t.price for t in trades]
+        if len(trade_prices):
             fig = px.histogram(x=trade_prices, nbins=50,
                               title="Trade Price Distribution",
                               color_discrete_sequence=["#7c9ef5"])
@@ -400,7 +498,8 @@ elif page == "Analytics":
             fig = px.scatter(x=ofi_trimmed, y=price_changes,
                            title=f"Order Flow Imbalance vs Price Change (corr={corr:.4f})",
                            color_discrete_sequence=["#00cc88"],
-                           opacity=0.5)
+                           opacity=0.5,
+                           render_mode="webgl")
             fig.update_layout(plot_bgcolor="#0f1117", paper_bgcolor="#0f1117",
                              font=dict(color="#e2e8f0"), height=350,
                              xaxis_title="Order Flow Imbalance",
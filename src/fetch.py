@@ -1,8 +1,18 @@
+import orjson
 import requests
+from requests.adapters import HTTPAdapter
+import numpy as np
 import pandas as pd
 import os
+from concurrent.futures import ThreadPoolExecutor
 
 BASE_URL = "https://api.kraken.com/0/public"
+TIMEOUT = 10
+
+# one pooled keep-alive session so snapshot requests share a TLS connection
+_SESSION = requests.Session()
+_SESSION.headers.update({"User-Agent": "lob-simulator"})
+_SESSION.mount("https://", HTTPAdapter(pool_connections=4, pool_maxsize=4))
 
 def fetch_order_book(symbol="XBTUSD", depth=50):
     """
@@ -10,12 +20,15 @@ def fetch_order_book(symbol="XBTUSD", depth=50):
     """
     url = f"{BASE_URL}/Depth"
     params = {"pair": symbol, "count": depth}
-    r = requests.get(url, params=params)
-    data = r.json()
+    r = _SESSION.get(url, params=params, timeout=TIMEOUT)
+    data = orjson.loads(r.content)
 
     result = list(data["result"].values())[0]
-    bids = pd.DataFrame(result["bids"], columns=["price", "quantity", "timestamp"]).astype(float)
-    asks = pd.DataFrame(result["asks"], columns=["price", "quantity", "timestamp"]).astype(float)
+    # parse straight to float64 so pandas skips inference and the astype copy
+    bids_arr = np.asarray(result["bids"], dtype=float).reshape(-1, 3)
+    asks_arr = np.asarray(result["asks"], dtype=float).reshape(-1, 3)
+    bids = pd.DataFrame(bids_arr, columns=["price", "quantity", "timestamp"])
+    asks = pd.DataFrame(asks_arr, columns=["price", "quantity", "timestamp"])
 
     bids["side"] = "bid"
     asks["side"] = "ask"
@@ -29,17 +42,20 @@ def fetch_recent_trades(symbol="XBTUSD", limit=500):
     """
     url = f"{BASE_URL}/Trades"
     params = {"pair": symbol}
-    r = requests.get(url, params=params)
-    data = r.json()
+    r = _SESSION.get(url, params=params, timeout=TIMEOUT)
+    data = orjson.loads(r.content)
 
     result = list(data["result"].values())[0]
-    df = pd.DataFrame(result, columns=["price", "qty", "time", "side", "order_type", "misc", "trade_id"])
-    df["price"] = df["price"].astype(float)
-    df["qty"] = df["qty"].astype(float)
-    df["time"] = pd.to_datetime(df["time"], unit="s")
-    df["side"] = df["side"].apply(lambda x: "buy" if x == "b" else "sell")
+    # rows are [price, volume, time, side, order_type, misc, trade_id]
+    price, qty, ts, side = list(zip(*result))[:4] if result else ((), (), (), ())
+    df = pd.DataFrame({
+        "time": pd.to_datetime(np.asarray(ts, dtype=float), unit="s"),
+        "price": np.asarray(price, dtype=float),
+        "qty": np.asarray(qty, dtype=float),
+        "side": np.where(np.asarray(side) == "b", "buy", "sell"),
+    })
 
-    return df[["time", "price", "qty", "side"]].tail(limit)
+    return df.tail(limit)
 
 
 def fetch_klines(symbol="XBTUSD", interval=1, limit=500):
@@ -49,8 +65,8 @@ def fetch_klines(symbol="XBTUSD", interval=1, limit=500):
     """
     url = f"{BASE_URL}/OHLC"
     params = {"pair": symbol, "interval": interval}
-    r = requests.get(url, params=params)
-    data = r.json()
+    r = _SESSION.get(url, params=params, timeout=TIMEOUT)
+    data = orjson.loads(r.content)
 
     result = list(data["result"].values())[0]
     df = pd.DataFrame(result, columns=[
@@ -69,8 +85,8 @@ def fetch_ticker_stats(symbol="XBTUSD"):
     """
     url = f"{BASE_URL}/Ticker"
     params = {"pair": symbol}
-    r = requests.get(url, params=params)
-    data = r.json()
+    r = _SESSION.get(url, params=params, timeout=TIMEOUT)
+    data = orjson.loads(r.content)
     result = list(data["result"].values())[0]
 
     return {
@@ -91,22 +107,23 @@ def save_snapshot(symbol="XBTUSD"):
     """
     os.makedirs("data", exist_ok=True)
 
-    print(f"Fetching order book...")
-    bids, asks = fetch_order_book(symbol, depth=50)
-
-    print(f"Fetching recent trades...")
-    trades = fetch_recent_trades(symbol, limit=500)
-
-    print(f"Fetching klines...")
-    klines = fetch_klines(symbol, interval=1, limit=500)
-
-    print(f"Fetching ticker stats...")
-    stats = fetch_ticker_stats(symbol)
-
-    bids.to_csv(f"data/{symbol}_bids.csv", index=False)
-    asks.to_csv(f"data/{symbol}_asks.csv", index=False)
-    trades.to_csv(f"data/{symbol}_trades.csv", index=False)
-    klines.to_csv(f"data/{symbol}_klines.csv", index=False)
+    # the four requests are independent, so fire them concurrently
+    print(f"Fetching order book, trades, klines and ticker stats...")
+    with ThreadPoolExecutor(max_workers=4) as ex:
+        book_f = ex.submit(fetch_order_book, symbol, 50)
+        trades_f = ex.submit(fetch_recent_trades, symbol, 500)
+        klines_f = ex.submit(fetch_klines, symbol, 1, 500)
+        stats_f = ex.submit(fetch_ticker_stats, symbol)
+
+        bids, asks = book_f.result()
+        trades = trades_f.result()
+        klines = klines_f.result()
+        stats = stats_f.result()
+
+    bids.to_parquet(f"data/{symbol}_bids.parquet", index=False, compression="snappy")
+    asks.to_parquet(f"data/{symbol}_asks.parquet", index=False, compression="snappy")
+    trades.to_parquet(f"data/{symbol}_trades.parquet", index=False, compression="snappy")
+    klines.to_parquet(f"data/{symbol}_klines.parquet", index=False, compression="snappy")
 
     print(f"\nSnapshot saved for {symbol}")
     print(f"  Bids:   {len(bids)} levels")
@@ -1,29 +1,41 @@
+import itertools
 import time
-from enum import Enum
+from enum import IntEnum
 
-class Side(Enum):
-    BUY = "buy"
-    SELL = "sell"
+class Side(IntEnum):
+    BUY = 0
+    SELL = 1
 
-class OrderType(Enum):
-    LIMIT = "limit"
-    MARKET = "market"
+class OrderType(IntEnum):
+    LIMIT = 0
+    MARKET = 1
+
+class Status(IntEnum):
+    OPEN = 1
+    PARTIAL = 2
+    FILLED = 4
+    CANCELLED = 8
+
+# orders in either state can no longer trade; test with `status & DEAD_MASK`
+DEAD_MASK = Status.FILLED | Status.CANCELLED
 
 class Order:
-    _id_counter = 0
+    __slots__ = ("id", "side", "order_type", "quantity", "price", "timestamp",
+                 "remaining", "filled", "trader_id", "status")
+
+    _next_id = itertools.count(1).__next__
 
     def __init__(self, side, order_type, quantity, price=None, trader_id="anonymous"):
-        Order._id_counter += 1
-        self.id = Order._id_counter
+        self.id = Order._next_id()
         self.side = side
         self.order_type = order_type
         self.quantity = quantity
         self.price = price          # None for market orders
-        self.timestamp = time.time()
+        self.timestamp = time.monotonic_ns()  # int, for time priority only
         self.remaining = quantity   # quantity not yet filled
         self.filled = 0.0
         self.trader_id = trader_id
-        self.status = "open"        # open, partial, filled, cancelled
+        self.status = Status.OPEN
 
     def fill(self, quantity):
         """Apply a fill to this order."""
@@ -31,19 +43,19 @@ class Order:
         self.filled += quantity
         self.remaining -= quantity
         if self.remaining == 0:
-            self.status = "filled"
+            self.status = Status.FILLED
         else:
-            self.status = "partial"
+            self.status = Status.PARTIAL
         return quantity
 
     def cancel(self):
-        self.status = "cancelled"
+        self.status = Status.CANCELLED
 
     def fill_pct(self):
         return (self.filled / self.quantity) * 100 if self.quantity > 0 else 0
 
     def __repr__(self):
-        return (f"Order(id={self.id}, side={self.side.value}, "
-                f"type={self.order_type.value}, qty={self.quantity:.4f}, "
+        return (f"Order(id={self.id}, side={self.side.name.lower()}, "
+                f"type={self.order_type.name.lower()}, qty={self.quantity:.4f}, "
                 f"price={self.price}, filled={self.filled:.4f}, "
-                f"status={self.status})")
\ No newline at end of file
+                f"status={self.status.name.lower()})")
\ No newline at end of file
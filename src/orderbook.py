@@ -1,15 +1,44 @@
-import heapq
-import time
-from collections import defaultdict
-from order import Order, Side, OrderType
+from collections import deque
+from itertools import islice
+from operator import neg
+import numpy as np
+from sortedcontainers import SortedDict
+from order import Order, Side, OrderType, Status, DEAD_MASK
+
+TRADE_BUFFER_SIZE = 10000
+TRADE_HISTORY_CAP = 100_000  # Trade objects kept for get_trade_history
+PRICE_SCALE = 100  # prices are keyed internally as integer cent ticks
+
+
+CACHE_LINE = 64  # bytes
+
+
+def to_ticks(price):
+    """Convert a float price to integer ticks."""
+    return int(round(price * PRICE_SCALE))
+
+
+def aligned_empty(n, dtype=np.float64, align=CACHE_LINE):
+    """
+    Like np.empty(n, dtype), but the data starts on an `align`-byte boundary
+    and the underlying buffer is padded to a whole number of cache lines.
+    """
+    dtype = np.dtype(dtype)
+    nbytes = -(-n * dtype.itemsize // align) * align
+    raw = np.empty(nbytes + align, dtype=np.uint8)
+    offset = -raw.ctypes.data % align
+    return raw[offset:offset + nbytes].view(dtype)[:n]
+
 
 class Trade:
-    def __init__(self, buy_order_id, sell_order_id, price, quantity, timestamp=None):
+    __slots__ = ("buy_order_id", "sell_order_id", "price", "quantity", "timestamp")
+
+    def __init__(self, buy_order_id, sell_order_id, price, quantity, timestamp):
         self.buy_order_id = buy_order_id
         self.sell_order_id = sell_order_id
         self.price = price
         self.quantity = quantity
-        self.timestamp = timestamp or time.time()
+        self.timestamp = timestamp  # aggressor's time.monotonic_ns(), not wall-clock
 
     def __repr__(self):
         return (f"Trade(buy={self.buy_order_id}, sell={self.sell_order_id}, "
@@ -17,263 +46,377 @@ class Trade:
 
 
 class PriceLevel:
-    """All orders at a single price level."""
-    def __init__(self, price):
-        self.price = price
-        self.orders = []  # queue of orders, FIFO
+    """
+    All orders at a single price level. Cancelled orders stay in the queue
+    until they reach the front and are skipped by the matcher; `count` and
+    `total_quantity` only reflect live orders.
+    """
+    __slots__ = ("tick", "orders", "total_quantity", "count")
+
+    def __init__(self, tick):
+        self.tick = tick  # price in integer ticks
+        self.orders = deque()  # queue of orders, FIFO
         self.total_quantity = 0.0
+        self.count = 0
 
     def add_order(self, order):
         self.orders.append(order)
         self.total_quantity += order.remaining
+        self.count += 1
 
-    def remove_filled(self):
-        before = sum(o.remaining for o in self.orders)
-        self.orders = [o for o in self.orders if o.remaining > 0 and o.status not in ("cancelled", "filled")]
-        self.total_quantity = sum(o.remaining for o in self.orders)
+    def cancel_order(self, order):
+        self.total_quantity -= order.remaining
+        self.count -= 1
 
     def is_empty(self):
-        return len(self.orders) == 0 or self.total_quantity == 0
+        return self.count == 0
 
     def __repr__(self):
-        return f"PriceLevel(price={self.price}, qty={self.total_quantity:.4f}, orders={len(self.orders)})"
+        return f"PriceLevel(price={self.tick / PRICE_SCALE}, qty={self.total_quantity:.4f}, orders={self.count})"
 
 
 class OrderBook:
     def __init__(self, symbol="XBTUSD"):
         self.symbol = symbol
 
-        # bids: max heap (negate price for max behavior)
-        self._bid_heap = []  # (-price, timestamp, order)
-        self._ask_heap = []  # (price, timestamp, order)
+        # price tick -> PriceLevel, iterated best price first
+        self._bids = SortedDict(neg)  # highest bid first
+        self._asks = SortedDict()     # lowest ask first
 
-        # price level lookup
-        self._bid_levels = {}  # price -> PriceLevel
-        self._ask_levels = {}  # price -> PriceLevel
+        # best price ticks, kept in step with every level insert/removal
+        self._best_bid = None
+        self._best_ask = None
 
         # order lookup
-        self._orders = {}  # order_id -> order
+        self._orders = {}        # order_id -> order
+        self._order_levels = {}  # order_id -> PriceLevel, resting orders only
+
+        # trade history, oldest dropped once the cap is reached
+        self.trades = deque(maxlen=TRADE_HISTORY_CAP)
 
-        # trade history
-        self.trades = []
+        # columnar ring buffer of recent trades for vectorized consumers
+        self._trade_prices = aligned_empty(TRADE_BUFFER_SIZE, np.float64)
+        self._trade_qtys = aligned_empty(TRADE_BUFFER_SIZE, np.float64)
+        self._trade_buy_ids = aligned_empty(TRADE_BUFFER_SIZE, np.int64)
+        self._trade_sell_ids = aligned_empty(TRADE_BUFFER_SIZE, np.int64)
+        self._trade_cursor = 0  # total trades ever written
 
         # metrics
         self.total_volume = 0.0
         self.total_trades = 0
 
+        # bumped on every mutation so readers can tell when state changed
+        self.version = 0
+
     def add_order(self, order):
         """Add a limit or market order to the book."""
+        self.version += 1
         self._orders[order.id] = order
 
         if order.order_type == OrderType.MARKET:
             trades = self._match_market_order(order)
         else:
-            trades = self._match_limit_order(order)
+            trades = self._match_limit_order(order, to_ticks(order.price))
 
         self.trades.extend(trades)
+        self._record_trades(trades)
         self.total_trades += len(trades)
-        self.total_volume += sum(t.quantity for t in trades)
 
         return trades
 
+    def bulk_seed(self, side, prices, quantities, trader_id="market_maker"):
+        """
+        Rest a batch of limit orders on one side without matching, e.g. from
+        a snapshot. Prices must not cross the opposite side of the book.
+        Returns the created orders.
+        """
+        book = self._bids if side == Side.BUY else self._asks
+        new_levels = {}
+        orders = []
+        for price, qty in zip(prices, quantities):
+            order = Order(side, OrderType.LIMIT, qty, price, trader_id)
+            tick = to_ticks(price)
+            level = book.get(tick)
+            if level is None:
+                level = new_levels.get(tick)
+                if level is None:
+                    level = new_levels[tick] = PriceLevel(tick)
+            level.add_order(order)
+            self._orders[order.id] = order
+            self._order_levels[order.id] = level
+            orders.append(order)
+
+        # one bulk insert of the new levels instead of one per order
+        book.update(new_levels)
+        if side == Side.BUY:
+            self._reset_best_bid()
+        else:
+            self._reset_best_ask()
+        self.version += 1
+        return orders
+
     def cancel_order(self, order_id):
         """Cancel an open order."""
         if order_id in self._orders:
+            self.version += 1
             order = self._orders[order_id]
             order.cancel()
-            # remove from price level
-            if order.side == Side.BUY and order.price in self._bid_levels:
-                self._bid_levels[order.price].remove_filled()
-            elif order.side == Side.SELL and order.price in self._ask_levels:
-                self._ask_levels[order.price].remove_filled()
+            # the matcher drops it from the queue lazily; drop the level once empty
+            level = self._order_levels.pop(order_id, None)
+            if level is not None:
+                level.cancel_order(order)
+                if level.is_empty():
+                    if order.side == Side.BUY:
+                        del self._bids[level.tick]
+                        self._reset_best_bid()
+                    else:
+                        del self._asks[level.tick]
+                        self._reset_best_ask()
             return True
         return False
 
     def _match_market_order(self, order):
         """Match a market order against the best available prices."""
-        trades = []
         if order.side == Side.BUY:
             # buy market order matches against asks (lowest first)
-            while order.remaining > 0 and self._ask_heap:
-                trades.extend(self._fill_from_asks(order))
-                if not self._ask_heap:
-                    break
+            trades = self._fill_from_asks(order, None)
         else:
             # sell market order matches against bids (highest first)
-            while order.remaining > 0 and self._bid_heap:
-                trades.extend(self._fill_from_bids(order))
-                if not self._bid_heap:
-                    break
+            trades = self._fill_from_bids(order, None)
 
         if order.remaining > 0:
-            order.status = "partial"
+            order.status = Status.PARTIAL
 
         return trades
 
-    def _match_limit_order(self, order):
+    def _match_limit_order(self, order, tick):
         """Match a limit order, then place remainder in book."""
-        trades = []
-
         if order.side == Side.BUY:
             # match against asks where ask price <= bid price
-            while (order.remaining > 0 and self._ask_heap and
-                   self._ask_heap[0][0] <= order.price):
-                trades.extend(self._fill_from_asks(order))
+            trades = self._fill_from_asks(order, tick)
 
             # place remainder in bid book
-            if order.remaining > 0 and order.status != "filled":
-                self._add_to_bids(order)
+            if order.remaining > 0:
+                self._add_to_bids(order, tick)
 
         else:
             # match against bids where bid price >= ask price
-            while (order.remaining > 0 and self._bid_heap and
-                   -self._bid_heap[0][0] >= order.price):
-                trades.extend(self._fill_from_bids(order))
+            trades = self._fill_from_bids(order, tick)
 
             # place remainder in ask book
-            if order.remaining > 0 and order.status != "filled":
-                self._add_to_asks(order)
+            if order.remaining > 0:
+                self._add_to_asks(order, tick)
 
         return trades
 
-    def _fill_from_asks(self, aggressive_order):
-        """Fill aggressive buy order from ask side."""
-        trades = []
-        while aggressive_order.remaining > 0 and self._ask_heap:
-            best_price, ts, passive_order = self._ask_heap[0]
+    def _fill_from_asks(self, aggressive_order, limit_tick):
+        """Fill aggressive buy order from ask side, up to limit_tick if given."""
+        # most resting limit orders don't cross; skip the walk entirely
+        best = self._best_ask
+        if best is None or (limit_tick is not None and best > limit_tick):
+            return []
 
-            if passive_order.status in ("filled", "cancelled"):
-                heapq.heappop(self._ask_heap)
-                continue
-
-            if aggressive_order.order_type == OrderType.LIMIT and best_price > aggressive_order.price:
+        trades = []
+        volume = 0.0
+        book = self._asks
+        order_levels = self._order_levels
+        aggressive_id = aggressive_order.id
+        stamp = aggressive_order.timestamp
+        while aggressive_order.remaining > 0 and book:
+            best_tick, level = book.peekitem(0)
+
+            if limit_tick is not None and best_tick > limit_tick:
                 break
 
-            fill_qty = min(aggressive_order.remaining, passive_order.remaining)
-            aggressive_order.fill(fill_qty)
-            passive_order.fill(fill_qty)
-
-            trade = Trade(
-                buy_order_id=aggressive_order.id,
-                sell_order_id=passive_order.id,
-                price=best_price,
-                quantity=fill_qty
-            )
-            trades.append(trade)
-
-            if passive_order.remaining == 0:
-                heapq.heappop(self._ask_heap)
-                if best_price in self._ask_levels:
-                    self._ask_levels[best_price].remove_filled()
-
+            best_price = best_tick / PRICE_SCALE
+
+            orders = level.orders
+            while aggressive_order.remaining > 0 and orders:
+                passive_order = orders[0]
+                if passive_order.status & DEAD_MASK:
+                    orders.popleft()
+                    continue
+                # fill() caps at the aggressive order's remaining quantity
+                fill_qty = aggressive_order.fill(passive_order.remaining)
+                passive_order.fill(fill_qty)
+                level.total_quantity -= fill_qty
+                volume += fill_qty
+                trades.append(Trade(aggressive_id, passive_order.id, best_price, fill_qty, stamp))
+
+                if passive_order.remaining == 0:
+                    orders.popleft()
+                    level.count -= 1
+                    del order_levels[passive_order.id]
+
+            if level.is_empty():
+                del book[best_tick]
+                self._reset_best_ask()
+
+        self.total_volume += volume
         return trades
 
-    def _fill_from_bids(self, aggressive_order):
-        """Fill aggressive sell order from bid side."""
-        trades = []
-        while aggressive_order.remaining > 0 and self._bid_heap:
-            neg_price, ts, passive_order = self._bid_heap[0]
-            best_price = -neg_price
-
-            if passive_order.status in ("filled", "cancelled"):
-                heapq.heappop(self._bid_heap)
-                continue
+    def _fill_from_bids(self, aggressive_order, limit_tick):
+        """Fill aggressive sell order from bid side, down to limit_tick if given."""
+        # most resting limit orders don't cross; skip the walk entirely
+        best = self._best_bid
+        if best is None or (limit_tick is not None and best < limit_tick):
+            return []
 
-            if aggressive_order.order_type == OrderType.LIMIT and best_price < aggressive_order.price:
+        trades = []
+        volume = 0.0
+        book = self._bids
+        order_levels = self._order_levels
+        aggressive_id = aggressive_order.id
+        stamp = aggressive_order.timestamp
+        while aggressive_order.remaining > 0 and book:
+            best_tick, level = book.peekitem(0)
+
+            if limit_tick is not None and best_tick < limit_tick:
                 break
 
-            fill_qty = min(aggressive_order.remaining, passive_order.remaining)
-            aggressive_order.fill(fill_qty)
-            passive_order.fill(fill_qty)
-
-            trade = Trade(
-                buy_order_id=passive_order.id,
-                sell_order_id=aggressive_order.id,
-                price=best_price,
-                quantity=fill_qty
-            )
-            trades.append(trade)
-
-            if passive_order.remaining == 0:
-                heapq.heappop(self._bid_heap)
-                if best_price in self._bid_levels:
-                    self._bid_levels[best_price].remove_filled()
-
+            best_price = best_tick / PRICE_SCALE
+
+            orders = level.orders
+            while aggressive_order.remaining > 0 and orders:
+                passive_order = orders[0]
+                if passive_order.status & DEAD_MASK:
+                    orders.popleft()
+                    continue
+                # fill() caps at the aggressive order's remaining quantity
+                fill_qty = aggressive_order.fill(passive_order.remaining)
+                passive_order.fill(fill_qty)
+                level.total_quantity -= fill_qty
+                volume += fill_qty
+                trades.append(Trade(passive_order.id, aggressive_id, best_price, fill_qty, stamp))
+
+                if passive_order.remaining == 0:
+                    orders.popleft()
+                    level.count -= 1
+                    del order_levels[passive_order.id]
+
+            if level.is_empty():
+                del book[best_tick]
+                self._reset_best_bid()
+
+        self.total_volume += volume
         return trades
 
-    def _add_to_bids(self, order):
-        price = order.price
-        if price not in self._bid_levels:
-            self._bid_levels[price] = PriceLevel(price)
-        self._bid_levels[price].add_order(order)
-        heapq.heappush(self._bid_heap, (-price, order.timestamp, order))
-
-    def _add_to_asks(self, order):
-        price = order.price
-        if price not in self._ask_levels:
-            self._ask_levels[price] = PriceLevel(price)
-        self._ask_levels[price].add_order(order)
-        heapq.heappush(self._ask_heap, (price, order.timestamp, order))
+    def _add_to_bids(self, order, tick):
+        level = self._bids.get(tick)
+        if level is None:
+            level = self._bids[tick] = PriceLevel(tick)
+            if self._best_bid is None or tick > self._best_bid:
+                self._best_bid = tick
+        level.add_order(order)
+        self._order_levels[order.id] = level
+
+    def _add_to_asks(self, order, tick):
+        level = self._asks.get(tick)
+        if level is None:
+            level = self._asks[tick] = PriceLevel(tick)
+            if self._best_ask is None or tick < self._best_ask:
+                self._best_ask = tick
+        level.add_order(order)
+        self._order_levels[order.id] = level
+
+    def _reset_best_bid(self):
+        self._best_bid = self._bids.peekitem(0)[0] if self._bids else None
+
+    def _reset_best_ask(self):
+        self._best_ask = self._asks.peekitem(0)[0] if self._asks else None
 
     def best_bid(self):
         """Return best bid price."""
-        while self._bid_heap:
-            neg_price, ts, order = self._bid_heap[0]
-            if order.status not in ("filled", "cancelled") and order.remaining > 0:
-                return -neg_price
-            heapq.heappop(self._bid_heap)
-        return None
+        return self._best_bid / PRICE_SCALE if self._best_bid is not None else None
 
     def best_ask(self):
         """Return best ask price."""
-        while self._ask_heap:
-            price, ts, order = self._ask_heap[0]
-            if order.status not in ("filled", "cancelled") and order.remaining > 0:
-                return price
-            heapq.heappop(self._ask_heap)
-        return None
+        return self._best_ask / PRICE_SCALE if self._best_ask is not None else None
 
     def spread(self):
         """Return bid-ask spread."""
-        bid = self.best_bid()
-        ask = self.best_ask()
-        if bid and ask:
-            return round(ask - bid, 2)
+        bid, ask = self._best_bid, self._best_ask
+        if bid is not None and ask is not None:
+            return (ask - bid) / PRICE_SCALE
         return None
 
     def mid_price(self):
         """Return mid price."""
-        bid = self.best_bid()
-        ask = self.best_ask()
-        if bid and ask:
-            return (bid + ask) / 2
+        bid, ask = self._best_bid, self._best_ask
+        if bid is not None and ask is not None:
+            return (bid + ask) / (2 * PRICE_SCALE)
         return None
 
+    def top_of_book(self):
+        """
+        Return (bid, ask, mid, spread) in one call. Mid and spread are None
+        unless both sides have orders.
+        """
+        bid, ask = self._best_bid, self._best_ask
+        if bid is None or ask is None:
+            return (self.best_bid(), self.best_ask(), None, None)
+        return (bid / PRICE_SCALE, ask / PRICE_SCALE,
+                (bid + ask) / (2 * PRICE_SCALE), (ask - bid) / PRICE_SCALE)
+
     def get_depth(self, levels=10):
         """
         Return order book depth as two lists of (price, quantity) tuples.
         Bids sorted descending, asks sorted ascending.
         """
-        # aggregate by price level
-        bid_depth = {}
-        for neg_price, ts, order in self._bid_heap:
-            if order.status not in ("filled", "cancelled") and order.remaining > 0:
-                price = -neg_price
-                bid_depth[price] = bid_depth.get(price, 0) + order.remaining
-
-        ask_depth = {}
-        for price, ts, order in self._ask_heap:
-            if order.status not in ("filled", "cancelled") and order.remaining > 0:
-                ask_depth[price] = ask_depth.get(price, 0) + order.remaining
-
-        bids = sorted(bid_depth.items(), key=lambda x: -x[0])[:levels]
-        asks = sorted(ask_depth.items(), key=lambda x: x[0])[:levels]
+        bids = [(tick / PRICE_SCALE, level.total_quantity)
+                for tick, level in islice(self._bids.items(), levels)]
+        asks = [(tick / PRICE_SCALE, level.total_quantity)
+                for tick, level in islice(self._asks.items(), levels)]
 
         return bids, asks
 
+    def get_depth_arrays(self, levels=10):
+        """
+        Return order book depth as (bid_prices, bid_qtys, ask_prices, ask_qtys)
+        float64 arrays, in the same order as get_depth.
+        """
+        bid_prices, bid_qtys = self._side_depth_arrays(self._bids, levels)
+        ask_prices, ask_qtys = self._side_depth_arrays(self._asks, levels)
+        return bid_prices, bid_qtys, ask_prices, ask_qtys
+
+    @staticmethod
+    def _side_depth_arrays(book, levels):
+        # read the first n levels straight into arrays, no tuple list in between
+        n = min(levels, len(book))
+        ticks = np.fromiter(islice(book.keys(), n), dtype=np.int64, count=n)
+        qtys = np.fromiter((level.total_quantity for level in islice(book.values(), n)),
+                           dtype=np.float64, count=n)
+        return ticks / PRICE_SCALE, qtys
+
     def get_trade_history(self, n=50):
         """Return last n trades."""
-        return self.trades[-n:]
+        return list(islice(reversed(self.trades), n))[::-1]
+
+    def _record_trades(self, trades):
+        for t in trades:
+            i = self._trade_cursor % TRADE_BUFFER_SIZE
+            self._trade_prices[i] = t.price
+            self._trade_qtys[i] = t.quantity
+            self._trade_buy_ids[i] = t.buy_order_id
+            self._trade_sell_ids[i] = t.sell_order_id
+            self._trade_cursor += 1
+
+    def _recent_trade_slots(self, n):
+        n = min(n, self._trade_cursor, TRADE_BUFFER_SIZE)
+        return np.arange(self._trade_cursor - n, self._trade_cursor) % TRADE_BUFFER_SIZE
+
+    def get_trade_prices_array(self, n=50):
+        """Return prices of the last n trades as a float64 array, oldest first."""
+        return self._trade_prices[self._recent_trade_slots(n)]
+
+    def get_recent_trades_arrays(self, n=50):
+        """
+        Return the last n trades as (prices, quantities, buy_ids, sell_ids)
+        arrays, oldest first.
+        """
+        idx = self._recent_trade_slots(n)
+        return (self._trade_prices[idx], self._trade_qtys[idx],
+                self._trade_buy_ids[idx], self._trade_sell_ids[idx])
 
     def summary(self):
         bids, asks = self.get_depth(5)
@@ -1,52 +1,115 @@
 import sys
 import os
+import math
 import time
-import random
 import numpy as np
 import pandas as pd
 
 sys.path.insert(0, os.path.dirname(__file__))
 from order import Order, Side, OrderType
-from orderbook import OrderBook
+from orderbook import OrderBook, aligned_empty
+
+METRICS_CAPACITY = 1024
+
+
+def _hawkes_event_loop(n_events, mu, alpha, beta, uniforms):
+    """
+    Generate Hawkes event times. Inter-arrival times are drawn by inverse
+    transform of `uniforms` (values in (0, 1]). With an exponential kernel
+    the excitation from all past events decays and jumps recursively:
+    excess <- excess * exp(-beta * dt) + alpha.
+    """
+    times = np.empty(n_events)
+    t = 0.0
+    excess = 0.0  # intensity above the base rate mu
+    for i, u in enumerate(uniforms.tolist()):
+        dt = -math.log(u) / (mu + excess)
+        t += dt
+        times[i] = t
+        excess = excess * math.exp(-beta * dt) + alpha
+    return times
+
+
+def _describe(a, with_std=False):
+    """min, max, mean and (if asked for) population std of a 1-d array."""
+    mean = a.mean()
+    std = None
+    if with_std:
+        # dot squares and sums in one pass where np.std takes two
+        dev = a - mean
+        std = np.sqrt(np.dot(dev, dev) / len(a))
+    return a.min(), a.max(), mean, std
+
 
 class MarketSimulator:
-    def __init__(self, symbol="XBTUSD"):
+    def __init__(self, symbol="XBTUSD", capacity=METRICS_CAPACITY):
         self.symbol = symbol
         self.book = OrderBook(symbol)
-        self.metrics = {
-            "spreads": [],
-            "mid_prices": [],
-            "timestamps": [],
-            "trade_prices": [],
-            "trade_quantities": [],
-            "trade_sides": [],
-            "order_flow_imbalance": [],
-        }
+        # per-event series, written by index and doubled on overflow
+        self._timestamps = []
+        self._mid_prices = aligned_empty(capacity)
+        self._spreads = aligned_empty(capacity)
+        self._ofi = aligned_empty(capacity)
+        self._n = 0
         self.buy_volume = 0.0
         self.sell_volume = 0.0
 
+    def _read_snapshot(self, name):
+        """
+        Read a saved snapshot table, preferring Parquet and falling back
+        to the older CSV snapshots. Returns None if neither exists.
+        """
+        path = f"data/{self.symbol}_{name}"
+        if os.path.exists(path + ".parquet"):
+            return pd.read_parquet(path + ".parquet")
+        if os.path.exists(path + ".csv"):
+            return pd.read_csv(path + ".csv")
+        return None
+
+    def _record_metrics(self, timestamp, mid, spread, ofi):
+        if self._n == len(self._mid_prices):
+            self._grow(("_mid_prices", "_spreads", "_ofi"), self._n)
+        n = self._n
+        self._mid_prices[n] = mid
+        self._spreads[n] = spread
+        self._ofi[n] = ofi
+        self._timestamps.append(timestamp)
+        self._n = n + 1
+
+    def _record_metrics_batch(self, timestamps, mids, spreads, ofi):
+        n, k = self._n, len(mids)
+        while n + k > len(self._mid_prices):
+            self._grow(("_mid_prices", "_spreads", "_ofi"), n)
+        self._mid_prices[n:n + k] = mids
+        self._spreads[n:n + k] = spreads
+        self._ofi[n:n + k] = ofi
+        self._timestamps.extend(timestamps.tolist())
+        self._n = n + k
+
+    def _grow(self, names, used):
+        """Double the named buffers, keeping their first `used` entries."""
+        for name in names:
+            old = getattr(self, name)
+            grown = aligned_empty(max(2 * len(old), 1), old.dtype)
+            grown[:used] = old[:used]
+            setattr(self, name, grown)
+
     def seed_from_snapshot(self):
         """
         Seed the order book with real Kraken snapshot data.
         """
-        bids_path = f"data/{self.symbol}_bids.csv"
-        asks_path = f"data/{self.symbol}_asks.csv"
+        bids = self._read_snapshot("bids")
+        asks = self._read_snapshot("asks")
 
-        if not os.path.exists(bids_path):
+        if bids is None or asks is None:
             raise FileNotFoundError(f"No snapshot found. Run fetch.py first.")
 
-        bids = pd.read_csv(bids_path)
-        asks = pd.read_csv(asks_path)
-
         print(f"Seeding order book with real {self.symbol} snapshot...")
 
-        for _, row in bids.iterrows():
-            order = Order(Side.BUY, OrderType.LIMIT, row["quantity"], row["price"], "market_maker")
-            self.book.add_order(order)
-
-        for _, row in asks.iterrows():
-            order = Order(Side.SELL, OrderType.LIMIT, row["quantity"], row["price"], "market_maker")
-            self.book.add_order(order)
+        self.book.bulk_seed(Side.BUY, bids["price"].to_numpy().tolist(),
+                            bids["quantity"].to_numpy().tolist())
+        self.book.bulk_seed(Side.SELL, asks["price"].to_numpy().tolist(),
+                            asks["quantity"].to_numpy().tolist())
 
         print(f"  Seeded {len(bids)} bid levels and {len(asks)} ask levels")
         print(f"  Best bid: ${self.book.best_bid():,.2f}")
@@ -58,53 +121,44 @@ class MarketSimulator:
         Replay real historical trades through the order book.
         Speed: 1.0 = real time, 10.0 = 10x faster
         """
-        trades_path = f"data/{self.symbol}_trades.csv"
-        if not os.path.exists(trades_path):
+        trades = self._read_snapshot("trades")
+        if trades is None:
             raise FileNotFoundError("No trades data found. Run fetch.py first.")
 
-        trades = pd.read_csv(trades_path)
         trades["time"] = pd.to_datetime(trades["time"])
         trades = trades.sort_values("time").reset_index(drop=True)
 
         print(f"\nReplaying {len(trades)} real trades...")
         print(f"Time range: {trades['time'].iloc[0]} -> {trades['time'].iloc[-1]}")
 
-        prev_time = None
+        # pull columns out once instead of boxing a Series per row
+        stamps = trades["time"].tolist()
+        is_buy = (trades["side"] == "buy").to_numpy().tolist()
+        qtys = trades["qty"].to_numpy().tolist()
+        gaps = np.diff(trades["time"].to_numpy()) / np.timedelta64(1, "s")
+        delays = np.concatenate(([0.0], gaps / speed)).tolist()
 
-        for _, row in trades.iterrows():
+        for stamp, buy, qty, delay in zip(stamps, is_buy, qtys, delays):
             # simulate time delay between trades
-            if prev_time is not None:
-                delay = (row["time"] - prev_time).total_seconds() / speed
-                if 0 < delay < 5:
-                    time.sleep(delay)
+            if 0 < delay < 5:
+                time.sleep(delay)
 
-            side = Side.BUY if row["side"] == "buy" else Side.SELL
-            order = Order(side, OrderType.MARKET, row["qty"], trader_id="replayer")
-            executed = self.book.add_order(order)
+            side = Side.BUY if buy else Side.SELL
+            order = Order(side, OrderType.MARKET, qty, trader_id="replayer")
+            self.book.add_order(order)
 
             # track volume imbalance
             if side == Side.BUY:
-                self.buy_volume += row["qty"]
+                self.buy_volume += qty
             else:
-                self.sell_volume += row["qty"]
+                self.sell_volume += qty
 
             # record metrics
-            mid = self.book.mid_price()
-            spread = self.book.spread()
+            _, _, mid, spread = self.book.top_of_book()
             ofi = self.buy_volume - self.sell_volume
 
             if mid and spread:
-                self.metrics["spreads"].append(spread)
-                self.metrics["mid_prices"].append(mid)
-                self.metrics["timestamps"].append(row["time"])
-                self.metrics["order_flow_imbalance"].append(ofi)
-
-            for t in executed:
-                self.metrics["trade_prices"].append(t.price)
-                self.metrics["trade_quantities"].append(t.quantity)
-                self.metrics["trade_sides"].append(side.value)
-
-            prev_time = row["time"]
+                self._record_metrics(stamp, mid, spread, ofi)
 
     def simulate_hawkes_orders(self, n_events=500, mid_price=68000.0):
         """
@@ -119,18 +173,9 @@ class MarketSimulator:
         alpha = 0.8    # self-excitation factor
         beta = 1.0     # decay rate
 
-        events = []
-        t = 0.0
-        lam = mu  # current intensity
-
-        while len(events) < n_events:
-            # time to next event
-            dt = np.random.exponential(1.0 / lam)
-            t += dt
-            events.append(t)
-            # intensity jumps on each event
-            lam = mu + alpha * sum(np.exp(-beta * (t - s)) for s in events[-20:])
-            lam = max(lam, mu)
+        rng = np.random.default_rng()
+        uniforms = 1.0 - rng.random(n_events)
+        events = _hawkes_event_loop(n_events, mu, alpha, beta, uniforms)
 
         print(f"  Generated {len(events)} Hawkes events")
 
@@ -138,47 +183,44 @@ class MarketSimulator:
         spread = 10.0
         volatility = 50.0
 
-        for i, t in enumerate(events):
-            # random walk mid price
-            mid_price += np.random.normal(0, volatility * 0.01)
+        # draw all per-order randomness up front
+        mids = mid_price + rng.normal(0, volatility * 0.01, n_events).cumsum()  # random walk
+        is_buy = rng.random(n_events) > 0.5
+        is_market = rng.random(n_events) < 0.3
+        qtys = np.maximum(0.001, np.round(np.abs(rng.lognormal(-2, 1, n_events)), 4))
+        offsets = rng.uniform(0, spread * 2, n_events)
+        prices = np.round(np.where(is_buy, mids - offsets, mids + offsets), 1)
 
-            side = Side.BUY if random.random() > 0.5 else Side.SELL
-            order_type = OrderType.MARKET if random.random() < 0.3 else OrderType.LIMIT
+        # only the book is touched per event; metrics are built afterwards
+        mid_arr = np.full(n_events, np.nan)
+        spread_arr = np.full(n_events, np.nan)
 
-            qty = abs(np.random.lognormal(mean=-2, sigma=1))
-            qty = max(0.001, round(qty, 4))
+        for i, (buy, market, qty, price) in enumerate(zip(
+                is_buy.tolist(), is_market.tolist(), qtys.tolist(), prices.tolist())):
+            side = Side.BUY if buy else Side.SELL
+            order_type = OrderType.MARKET if market else OrderType.LIMIT
 
             if order_type == OrderType.LIMIT:
-                if side == Side.BUY:
-                    price = round(mid_price - random.uniform(0, spread * 2), 1)
-                else:
-                    price = round(mid_price + random.uniform(0, spread * 2), 1)
                 order = Order(side, order_type, qty, price, f"trader_{i%20}")
             else:
                 order = Order(side, order_type, qty, trader_id=f"trader_{i%20}")
 
-            executed = self.book.add_order(order)
+            self.book.add_order(order)
 
-            # track metrics
-            mid = self.book.mid_price()
-            spread_val = self.book.spread()
-            ofi = self.buy_volume - self.sell_volume
+            _, _, mid, spread_val = self.book.top_of_book()
+            if mid is not None:
+                mid_arr[i] = mid
+                spread_arr[i] = spread_val
 
-            if mid and spread_val:
-                self.metrics["spreads"].append(spread_val)
-                self.metrics["mid_prices"].append(mid)
-                self.metrics["timestamps"].append(t)
-                self.metrics["order_flow_imbalance"].append(ofi)
+        # ofi seen by each event is the signed volume of the orders before it
+        signed = np.where(is_buy, qtys, -qtys)
+        ofi = self.buy_volume - self.sell_volume + np.cumsum(signed) - signed
 
-            for tr in executed:
-                self.metrics["trade_prices"].append(tr.price)
-                self.metrics["trade_quantities"].append(tr.quantity)
-                self.metrics["trade_sides"].append(side.value)
+        valid = (mid_arr != 0) & (spread_arr != 0) & ~np.isnan(mid_arr)
+        self._record_metrics_batch(events[valid], mid_arr[valid], spread_arr[valid], ofi[valid])
 
-            if side == Side.BUY:
-                self.buy_volume += qty
-            else:
-                self.sell_volume += qty
+        self.buy_volume += qtys[is_buy].sum()
+        self.sell_volume += qtys[~is_buy].sum()
 
     def compute_analytics(self):
         """
@@ -188,37 +230,38 @@ class MarketSimulator:
         print("MARKET MICROSTRUCTURE ANALYTICS")
         print("=" * 50)
 
-        prices = self.metrics["mid_prices"]
-        spreads = self.metrics["spreads"]
-        ofi = self.metrics["order_flow_imbalance"]
-        trade_prices = self.metrics["trade_prices"]
+        prices = self._mid_prices[:self._n]
+        spreads = self._spreads[:self._n]
+        ofi = self._ofi[:self._n]
 
-        if not prices:
+        if not self._n:
             print("No data yet.")
             return
 
+        p_min, p_max, _, p_std = _describe(prices, with_std=True)
+        s_min, s_max, s_mean, _ = _describe(spreads)
+
         print(f"Total orders processed: {self.book.total_trades + len(self.book._orders)}")
         print(f"Total trades executed:  {self.book.total_trades}")
         print(f"Total volume traded:    {self.book.total_volume:.4f} BTC")
         print(f"\nPrice Statistics:")
         print(f"  Starting mid price:  ${prices[0]:,.2f}")
         print(f"  Ending mid price:    ${prices[-1]:,.2f}")
-        print(f"  Price range:         ${min(prices):,.2f} - ${max(prices):,.2f}")
-        print(f"  Price volatility:    ${np.std(prices):,.2f}")
+        print(f"  Price range:         ${p_min:,.2f} - ${p_max:,.2f}")
+        print(f"  Price volatility:    ${p_std:,.2f}")
         print(f"\nSpread Statistics:")
-        print(f"  Mean spread:         ${np.mean(spreads):.2f}")
-        print(f"  Min spread:          ${min(spreads):.2f}")
-        print(f"  Max spread:          ${max(spreads):.2f}")
+        print(f"  Mean spread:         ${s_mean:.2f}")
+        print(f"  Min spread:          ${s_min:.2f}")
+        print(f"  Max spread:          ${s_max:.2f}")
         print(f"\nOrder Flow:")
         print(f"  Buy volume:          {self.buy_volume:.4f} BTC")
         print(f"  Sell volume:         {self.sell_volume:.4f} BTC")
         print(f"  Net imbalance:       {self.buy_volume - self.sell_volume:+.4f} BTC")
 
         # OFI as price predictor
-        if len(ofi) > 10 and len(prices) > 10:
-            min_len = min(len(ofi), len(prices) - 1)
-            price_changes = np.diff(prices[:min_len + 1])
-            ofi_arr = np.array(ofi[:min_len])
+        if self._n > 10:
+            price_changes = np.diff(prices)
+            ofi_arr = ofi[:-1]
             if np.std(ofi_arr) > 0:
                 corr = np.corrcoef(ofi_arr, price_changes)[0, 1]
                 print(f"\nOrder Flow Imbalance → Price correlation: {corr:.4f}")
@@ -228,18 +271,13 @@ class MarketSimulator:
 
     def get_metrics_df(self):
         """Return metrics as a DataFrame for the dashboard."""
-        n = min(
-            len(self.metrics["timestamps"]),
-            len(self.metrics["mid_prices"]),
-            len(self.metrics["spreads"]),
-            len(self.metrics["order_flow_imbalance"])
-        )
+        n = self._n
         return pd.DataFrame({
-            "timestamp": self.metrics["timestamps"][:n],
-            "mid_price": self.metrics["mid_prices"][:n],
-            "spread": self.metrics["spreads"][:n],
-            "order_flow_imbalance": self.metrics["order_flow_imbalance"][:n],
-        })
+            "timestamp": self._timestamps,
+            "mid_price": self._mid_prices[:n],
+            "spread": self._spreads[:n],
+            "order_flow_imbalance": self._ofi[:n],
+        }, copy=False)
 
 
 if __name__ == "__main__":